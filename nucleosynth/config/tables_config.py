@@ -1,4 +1,4 @@
-columns = ['Time', 'Density', 'Temperature', 'Ye', 'HeatingRate', 'Entropy']
+columns = ('Time', 'Density', 'Temperature', 'Ye', 'HeatingRate', 'Entropy')
 
 # rescale columns by this factor
 column_scales = {
@@ -7,3 +7,13 @@ column_scales = {
 
 stir_columns = ['time', 'temperature', 'density', 'radius', 'ye',
                 'enue', 'enua', 'fnue', 'fnua']
+
+# hdf5 chunk cache settings used when opening tracer files (see h5py.File)
+chunk_cache = {
+    'rdcc_nbytes': 64 * 1024**2,
+    'rdcc_nslots': 10_007,
+    'rdcc_w0': 0.75,
+}
+
+# target size (bytes) of Y chunks in rechunked tracer files
+rechunk_y_bytes = 1024**2
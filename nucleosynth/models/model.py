@@ -1,6 +1,9 @@
-import numpy as np
+import os
+import functools
+import multiprocessing
 import pandas as pd
 import time
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
 
 # nucleosynth
 from nucleosynth import tracers
@@ -22,8 +25,14 @@ class Model:
         Name of skynet model, e.g. 'traj_s12.0'
     n_tracers : int
         number of tracers in model
+    n_workers : int
+        max number of threads (or processes) used to load tracers
+    processes : bool
+        load tracers in worker processes instead of threads (the default)
     paths : str
         Path to skynet output directory of model
+    precision : str
+        floating-point dtype of tracer composition tables
     tracers : {tracer_id: Tracer}
         Collection of tracer objects
     tracer_steps : [int]
@@ -43,6 +52,9 @@ class Model:
                  reload=False,
                  save=True,
                  load_all=True,
+                 n_workers=None,
+                 processes=False,
+                 precision='float64',
                  verbose=True):
         """
         parameters
@@ -54,6 +66,16 @@ class Model:
         reload : bool
         save : bool
         load_all : bool
+        n_workers : int
+            max number of workers used to load tracers.
+            Defaults to number of CPUs. If 1, load tracers serially
+        processes : bool
+            By default (False), tracers are loaded in threads.
+            If True, use worker processes instead (avoids contention
+            on the HDF5 library lock, at the cost of pickling each tracer
+            back to this process)
+        precision : 'float64' or 'float32'
+            dtype of tracer composition tables (see Tracer)
         verbose : bool
         """
         self.model = model
@@ -64,7 +86,14 @@ class Model:
         self.save = save
         self.verbose = verbose
 
+        if n_workers is None:
+            n_workers = min(self.n_tracers, os.cpu_count() or 1)
+        self.n_workers = max(1, n_workers)
+        self.processes = processes
+        self.precision = precision
+
         self.network_unique = None
+        self.network_arrays = None
         self.network = None
         self.yields = None
         self.yield_sums = None
@@ -105,8 +134,8 @@ class Model:
         self.mass_grid = tracers.load_save.get_stir_mass_grid(self.tracer_ids,
                                                               model=self.model,
                                                               verbose=self.verbose)
-        self.dmass = np.diff(self.mass_grid)[0]  # Assume equally-spaced
-        self.total_mass = len(self.tracers)*self.dmass
+        self.dmass = self.mass_grid[1] - self.mass_grid[0]  # Assume equally-spaced
+        self.total_mass = self.n_tracers * self.dmass
 
     def load_network(self):
         """Load table of network isotopes
@@ -121,28 +150,88 @@ class Model:
         self.get_network_unique()
 
     def get_network_unique(self):
-        """Get unique Z and A in network
+        """Get unique Z and A in network, and precomputed network arrays
         """
-        self.network_unique = network.get_network_unique(self.network)
+        self.network_arrays = network.NetworkArrays(self.network)
+        self.network_unique = self.network_arrays.unique
 
     def load_tracers(self):
         """Load all tracers
+
+        Tracers are loaded concurrently in up to n_workers threads
+        (or processes, if self.processes=True),
+        since most of the load time is spent in file I/O.
+        Concurrently-loaded tracers don't print their own output
         """
         t0 = time.time()
-        for tracer_id in self.tracers:
-            self.printv('-'*20)
-            self.load_tracer(tracer_id)
+
+        if self.n_workers == 1:
+            for tracer_id in self.tracers:
+                self.printv('-'*20)
+                self.load_tracer(tracer_id)
+        else:
+            tracer_ids = list(self.tracers)
+            workers = 'processes' if self.processes else 'threads'
+            self.printv(f'Loading {len(tracer_ids)} tracers '
+                        f'with {self.n_workers} {workers}')
+
+            if self.processes:
+                # spawn fresh workers, as the HDF5 library isn't fork-safe
+                context = multiprocessing.get_context('spawn')
+                executor = ProcessPoolExecutor(max_workers=self.n_workers,
+                                               mp_context=context)
+                create_tracer = functools.partial(create_detached_tracer,
+                                                  model=self.model,
+                                                  steps=self.tracer_steps,
+                                                  save=self.save,
+                                                  reload=self.reload,
+                                                  tracer_network=self.network,
+                                                  network_arrays=self.network_arrays,
+                                                  precision=self.precision,
+                                                  verbose=False)
+            else:
+                executor = ThreadPoolExecutor(max_workers=self.n_workers)
+                create_tracer = functools.partial(self._create_tracer,
+                                                  verbose=False)
+
+            with executor:
+                loaded = executor.map(create_tracer, tracer_ids)
+
+                for tracer_id, tracer in zip(tracer_ids, loaded):
+                    # re-share after pickling
+                    tracer.network = self.network
+                    tracer.network_arrays = self.network_arrays
+                    tracer.network_unique = self.network_unique
+                    tracer.verbose = self.verbose
+                    self.tracers[tracer_id] = tracer
 
         t1 = time.time()
         self.printv('-'*20 + f'\nTotal load time: {t1-t0:.3f} s\n' + '-'*20)
 
     def load_tracer(self, tracer_id):
-        """Load all tracers
+        """Load single tracer
+        """
+        self.tracers[tracer_id] = self._create_tracer(tracer_id)
+
+    def _create_tracer(self, tracer_id, verbose=None):
+        """Return new Tracer object of given tracer_id
+
+        parameters
+        ----------
+        tracer_id : int
+        verbose : bool
+            defaults to self.verbose
         """
-        self.tracers[tracer_id] = tracers.tracer.Tracer(tracer_id, self.model,
-                                                        steps=self.tracer_steps,
-                                                        save=self.save, reload=self.reload,
-                                                        verbose=self.verbose)
+        if verbose is None:
+            verbose = self.verbose
+
+        return tracers.tracer.Tracer(tracer_id, self.model,
+                                     steps=self.tracer_steps,
+                                     save=self.save, reload=self.reload,
+                                     tracer_network=self.network,
+                                     network_arrays=self.network_arrays,
+                                     precision=self.precision,
+                                     verbose=verbose)
 
     def get_column_list(self):
         """Get list of columns in tracer data
@@ -167,7 +256,8 @@ class Model:
         """
         self.printv('Grouping final yields by A and Z')
         self.check_loaded()
-        self.yield_sums = network.get_all_yield_sums(self.yields)
+        self.yield_sums = network.get_all_yield_sums(self.yields,
+                                                     network_arrays=self.network_arrays)
 
         # get mass yield in msun
         for iso_group in ['A', 'Z']:
@@ -180,7 +270,8 @@ class Model:
     def select_yields(self, a=None, z=None):
         """Select subset of yields matching given A and/or Z
         """
-        return network.select_isotopes(self.yields, a=a, z=z)
+        return network.select_isotopes(self.yields, a=a, z=z,
+                                       network_arrays=self.network_arrays)
 
     # ===============================================================
     #                      Plotting
@@ -260,3 +351,21 @@ class Model:
         """Print string if verbose is True
         """
         printing.printv(string, verbose=self.verbose)
+
+
+def create_detached_tracer(tracer_id, model, **kwargs):
+    """Return new Tracer object, without its open raw files
+
+    Used for loading tracers in worker processes,
+    as h5py file handles can't be pickled
+
+    parameters
+    ----------
+    tracer_id : int
+    model : str
+    **kwargs
+        passed to Tracer()
+    """
+    tracer = tracers.tracer.Tracer(tracer_id, model, **kwargs)
+    tracer.files = None
+    return tracer
@@ -1,5 +1,7 @@
+import functools
 import numpy as np
 import pandas as pd
+from concurrent.futures import ThreadPoolExecutor
 
 # nucleosynth
 from .config import elements
@@ -22,11 +24,18 @@ tracer_network : pd.DataFrame
     
 """
 
+# element strings indexed by Z (None where undefined)
+_element_strs = tuple(elements.elements.get(z)
+                      for z in range(max(elements.elements) + 1))
+
+# same, as array for vectorized lookup
+_element_table = np.array(_element_strs, dtype=object)
+
 
 # ===============================================================
 #                      network table
 # ===============================================================
-def select_isotopes(isotope_table, a=None, z=None):
+def select_isotopes(isotope_table, a=None, z=None, network_arrays=None):
     """Return subset of table with given A and/or Z
 
     parameters
@@ -35,19 +44,131 @@ def select_isotopes(isotope_table, a=None, z=None):
         any table containing both A and Z columns (e.g., tracer_network)
     z : int
     a : int
+    network_arrays : NetworkArrays
+        precomputed network arrays, used to look up rows directly.
+        Rows of isotope_table must be in the same order as the network
     """
     if (z is None) and (a is None):
         raise ValueError('Must specify at least one of Z, A')
 
-    z_mask = isotope_table['Z'] == z
-    a_mask = isotope_table['A'] == a
+    if network_arrays is None:
+        rows = get_isotope_rows(isotope_table, z=z, a=a)
+    else:
+        rows = get_network_rows(network_arrays.index, z=z, a=a)
+
+    return isotope_table.iloc[rows]
+
 
-    if None in [z, a]:
-        mask = np.logical_or(z_mask, a_mask)
+def get_isotope_rows(isotope_table, z=None, a=None):
+    """Return row positions of isotopes in table with given A and/or Z
+
+    Returns : np.ndarray
+
+    parameters
+    ----------
+    isotope_table : pd.DataFrame
+        any table containing both A and Z columns (e.g., tracer_network)
+    z : int
+    a : int
+    """
+    check_a_and_or_z(z=z, a=a)
+
+    if z is None:
+        mask = isotope_table['A'].to_numpy() == a
+    elif a is None:
+        mask = isotope_table['Z'].to_numpy() == z
     else:
-        mask = np.logical_and(z_mask, a_mask)
+        mask = ((isotope_table['Z'].to_numpy() == z)
+                & (isotope_table['A'].to_numpy() == a))
+
+    return np.flatnonzero(mask)
+
 
-    return isotope_table[mask]
+def get_tracer_network(z, a):
+    """Return table of network isotopes from arrays of Z and A
+
+    Returns : pd.DataFrame
+        with columns: isotope, Z, A
+
+    parameters
+    ----------
+    z : [int]
+    a : [int]
+    """
+    iso_strs = get_isotope_strs(z=z, a=a)
+    return pd.DataFrame({'isotope': iso_strs, 'Z': z, 'A': a})
+
+
+def build_network_index(tracer_network):
+    """Get row positions of each unique A and Z in network
+
+    Returns : {iso_group: {int: [int]}}
+
+    parameters
+    ----------
+    tracer_network : pd.DataFrame
+    """
+    network_index = {}
+
+    for iso_group in ['A', 'Z']:
+        keys = tracer_network[iso_group].to_numpy()
+        unique, inverse = np.unique(keys, return_inverse=True)
+
+        order = np.argsort(inverse, kind='stable')
+        bounds = np.cumsum(np.bincount(inverse))[:-1]
+        network_index[iso_group] = dict(zip(unique, np.split(order, bounds)))
+
+    return network_index
+
+
+def get_network_rows(network_index, z=None, a=None):
+    """Return row positions of network isotopes with given A and/or Z
+
+    Returns : np.ndarray
+
+    parameters
+    ----------
+    network_index : {iso_group: {int: [int]}}
+        as returned by build_network_index()
+    z : int
+    a : int
+    """
+    check_a_and_or_z(z=z, a=a)
+    empty = np.array([], dtype=int)
+
+    if z is None:
+        return network_index['A'].get(a, empty)
+    elif a is None:
+        return network_index['Z'].get(z, empty)
+    else:
+        return np.intersect1d(network_index['A'].get(a, empty),
+                              network_index['Z'].get(z, empty),
+                              assume_unique=True)
+
+
+def get_network_groups(tracer_network):
+    """Get column ordering needed to sum over each unique A and Z in network
+
+    Returns : {iso_group: {str: np.ndarray}}
+        unique : unique A/Z values
+        order : column order that sorts network by A/Z
+        starts : position of each unique A/Z in the sorted columns
+
+    parameters
+    ----------
+    tracer_network : pd.DataFrame
+    """
+    network_groups = {}
+
+    for iso_group in ['A', 'Z']:
+        keys = tracer_network[iso_group].to_numpy()
+        order = np.argsort(keys, kind='stable')
+        unique, starts = np.unique(keys[order], return_index=True)
+
+        network_groups[iso_group] = {'unique': unique,
+                                     'order': order,
+                                     'starts': starts}
+    return network_groups
 
 
 def get_network_unique(tracer_network):
@@ -67,6 +188,41 @@ def get_network_unique(tracer_network):
     return network_unique
 
 
+# ===============================================================
+#                      network arrays
+# ===============================================================
+class NetworkArrays:
+    """Arrays precomputed from a network table, for repeated calculations
+
+    attributes
+    ----------
+    a : np.ndarray
+        A of each isotope, as floats
+    z : np.ndarray
+        Z of each isotope, as floats
+    groups : {iso_group: {str: np.ndarray}}
+        column ordering for summing over each unique A and Z
+        (see get_network_groups)
+    index : {iso_group: {int: [int]}}
+        row positions of each unique A and Z (see build_network_index)
+    unique : {iso_group: [int]}
+        unique A and Z in network
+    """
+
+    def __init__(self, tracer_network):
+        """
+        parameters
+        ----------
+        tracer_network : pd.DataFrame
+        """
+        self.a = tracer_network['A'].to_numpy(dtype=float)
+        self.z = tracer_network['Z'].to_numpy(dtype=float)
+        self.groups = get_network_groups(tracer_network)
+        self.index = build_network_index(tracer_network)
+        self.unique = {iso_group: group['unique']
+                       for iso_group, group in self.groups.items()}
+
+
 # ===============================================================
 #                      composition
 # ===============================================================
@@ -85,40 +241,74 @@ def get_most_abundant(composition_table, tracer_network, abu_var, n=10):
     n : int
         find 'n' most abundant isotopes
     """
-    isotopes = tracer_network.copy()
     column_str = f'max_{abu_var}'
-    max_values = composition_table.max()
-    isotopes[column_str] = max_values.values
+    max_values = composition_table.max().to_numpy()
 
-    largest = isotopes.nlargest(n, column_str)
+    # stable sort, so ties keep network order (as with nlargest(keep='first'))
+    rows = np.sort(np.argsort(-max_values, kind='stable')[:n])
 
-    return largest.sort_index()
+    largest = tracer_network.iloc[rows]
+
+    return largest.assign(**{column_str: max_values[rows]})
 
 
 # ===============================================================
 #                      sums
 # ===============================================================
-def get_all_sums(composition, tracer_network):
+def get_all_sums(composition, tracer_network, network_arrays=None, n_workers=1):
     """Get all X, Y sums over A, Z
 
+    If both X and Y are given, X sums over A are taken from the Y sums,
+    since X = Y*A and every isotope in a group has the same A
+
     Returns : {iso_group: {abu_var: pd.DataFrame}}
 
     parameters
     ----------
     composition : {abu_var: pd.DataFrame}
     tracer_network : pd.DataFrame
+    network_arrays : NetworkArrays
+        precomputed network arrays. Calculated if not provided
+    n_workers : int
+        number of threads to calculate sums in (the numpy reductions
+        release the GIL). Defaults to serial, as Model already loads
+        tracers concurrently
     """
     sums = {'A': {}, 'Z': {}}
+    tasks = []
+
+    if network_arrays is None:
+        network_arrays = NetworkArrays(tracer_network)
 
     for iso_group in sums:
         for comp_key, comp_table in composition.items():
-            sums[iso_group][comp_key] = get_sums(comp_table,
-                                                 tracer_network=tracer_network,
-                                                 iso_group=iso_group)
+            if (iso_group == 'A') and (comp_key == 'X') and ('Y' in composition):
+                continue
+
+            tasks += [(iso_group, comp_key, comp_table)]
+
+    def sum_table(task):
+        iso_group, _, comp_table = task
+        return get_sums(comp_table, tracer_network=tracer_network,
+                        iso_group=iso_group, network_arrays=network_arrays)
+
+    if n_workers == 1:
+        results = map(sum_table, tasks)
+    else:
+        with ThreadPoolExecutor(max_workers=n_workers) as executor:
+            results = list(executor.map(sum_table, tasks))
+
+    for (iso_group, comp_key, _), table in zip(tasks, results):
+        sums[iso_group][comp_key] = table
+
+    if ('X' in composition) and ('Y' in composition):
+        y_sums = sums['A']['Y']
+        sums['A']['X'] = y_sums.multiply(y_sums.columns.to_numpy(dtype=float))
+
     return sums
 
 
-def get_sums(composition_table, tracer_network, iso_group):
+def get_sums(composition_table, tracer_network, iso_group, network_arrays=None):
     """Calculate sums of X and Y for fixed Z or A
         i.e., sum table columns grouped by either Z or A
 
@@ -132,24 +322,35 @@ def get_sums(composition_table, tracer_network, iso_group):
     tracer_network : pd.DataFrame
     iso_group : 'A' or 'Z'
         Which atomic number to group columns by
+    network_arrays : NetworkArrays
+        precomputed network arrays
     """
-    sums = pd.DataFrame()
-    a = None
-    z = None
+    if network_arrays is None:
+        group = get_network_groups(tracer_network)[iso_group]
+    else:
+        group = network_arrays.groups[iso_group]
 
-    unique = np.unique(tracer_network[iso_group])
+    sums = sum_groups(composition_table.to_numpy(), group=group)
 
-    for val in unique:
-        if iso_group == 'A':
-            a = val
-        else:
-            z = val
+    return pd.DataFrame(sums, index=composition_table.index,
+                        columns=group['unique'], copy=False)
 
-        subset = select_composition(composition_table, tracer_network=tracer_network,
-                                    z=z, a=a)
-        sums[val] = np.sum(subset, axis=1)
 
-    return sums
+def sum_groups(values, group):
+    """Sum columns of 2D array over each group of A or Z
+
+    Returns : np.ndarray
+        with one column per unique A/Z
+
+    parameters
+    ----------
+    values : np.ndarray
+        2D array, with columns in network order
+    group : {str: np.ndarray}
+        one entry of get_network_groups()
+    """
+    sorted_values = values[:, group['order']]
+    return np.add.reduceat(sorted_values, group['starts'], axis=1, dtype=np.float64)
 
 
 # ===============================================================
@@ -166,20 +367,17 @@ def get_yields(tracers, tracer_network, abu_vars=('X', 'Y')):
     tracer_network : pd.DataFrame
     abu_vars : [str]
     """
-    yields = pd.DataFrame(tracer_network)
-    n_tracers = len(tracers)
+    yields = tracer_network.copy()
 
     for abu_var in abu_vars:
-        yields[abu_var] = 0.0
-
-        for tracer_id, tracer in tracers.items():
-            last_row = tracer.composition[abu_var].iloc[-1]
-            yields[abu_var] += np.array(last_row) / n_tracers
+        last_rows = np.stack([tracer.final_composition[abu_var]
+                              for tracer in tracers.values()])
+        yields[abu_var] = last_rows.mean(axis=0, dtype=np.float64)
 
     return yields
 
 
-def get_all_yield_sums(yields):
+def get_all_yield_sums(yields, network_arrays=None):
     """Sum over yields grouped by both A and Z
 
     Returns : {iso_group: pd.DataFrame}
@@ -187,16 +385,19 @@ def get_all_yield_sums(yields):
     parameters
     ----------
     yields : pd.DataFrame
+    network_arrays : NetworkArrays
+        precomputed network arrays. Rows of yields must be in network order
     """
     yield_sums = {'A': None, 'Z': None}
 
     for iso_group in yield_sums:
-        yield_sums[iso_group] = get_yield_sums(yields, iso_group=iso_group)
+        yield_sums[iso_group] = get_yield_sums(yields, iso_group=iso_group,
+                                               network_arrays=network_arrays)
 
     return yield_sums
 
 
-def get_yield_sums(yields, iso_group, abu_vars=('X', 'Y')):
+def get_yield_sums(yields, iso_group, abu_vars=('X', 'Y'), network_arrays=None):
     """Sum over yields grouped by A or Z
 
     Returns : pd.DataFrame
@@ -207,33 +408,20 @@ def get_yield_sums(yields, iso_group, abu_vars=('X', 'Y')):
     iso_group : 'A' or 'Z'
     abu_vars : [str]
         which abundance variables to extract (X and/or Y)
+    network_arrays : NetworkArrays
+        precomputed network arrays. Rows of yields must be in network order
     """
-    yield_sums = pd.DataFrame()
-    group_unique = np.unique(yields[iso_group])
-
-    sums = {}
-    for abu_var in abu_vars:
-        sums[abu_var] = np.full(len(group_unique), np.nan)
+    if network_arrays is None:
+        group = get_network_groups(yields)[iso_group]
+    else:
+        group = network_arrays.groups[iso_group]
 
-    a = None
-    z = None
+    yield_sums = pd.DataFrame({iso_group: group['unique']})
 
     # TODO: check to properly weight by A, Z?
-    for i, val in enumerate(group_unique):
-        if iso_group == 'A':
-            a = val
-        else:
-            z = val
-
-        subset = select_isotopes(yields, a=a, z=z)
-
-        for abu_var in abu_vars:
-            sums[abu_var][i] = np.sum(subset[abu_var])
-
-    yield_sums[iso_group] = group_unique
-
     for abu_var in abu_vars:
-        yield_sums[abu_var] = sums[abu_var]
+        values = yields[abu_var].to_numpy()
+        yield_sums[abu_var] = np.add.reduceat(values[group['order']], group['starts'])
 
     return yield_sums
 
@@ -241,7 +429,8 @@ def get_yield_sums(yields, iso_group, abu_vars=('X', 'Y')):
 # ===============================================================
 #                      tables
 # ===============================================================
-def select_composition(composition_table, tracer_network, z=None, a=None):
+def select_composition(composition_table, tracer_network, z=None, a=None,
+                       network_arrays=None):
     """Return subset of X or Y table with given A and/or Z
 
     Returns : pd.DataFrame
@@ -253,12 +442,18 @@ def select_composition(composition_table, tracer_network, z=None, a=None):
     tracer_network : pd.DataFrame
     z : int
     a : int
+    network_arrays : NetworkArrays
+        precomputed network arrays
     """
-    sub_net = select_isotopes(tracer_network, z=z, a=a)
-    return composition_table.iloc[:, sub_net.index]
+    if network_arrays is None:
+        rows = get_isotope_rows(tracer_network, z=z, a=a)
+    else:
+        rows = get_network_rows(network_arrays.index, z=z, a=a)
 
+    return composition_table.iloc[:, rows]
 
-def get_x(y_table, tracer_network):
+
+def get_x(y_table, tracer_network, network_arrays=None):
     """Calculate X table from Y table
 
     X = Y*A
@@ -269,12 +464,21 @@ def get_x(y_table, tracer_network):
     ----------
     y_table : pd.DataFrame
     tracer_network : pd.DataFrame
+    network_arrays : NetworkArrays
+        precomputed network arrays
     """
-    a = np.array(tracer_network['A'])
-    return y_table.multiply(a)
+    if network_arrays is None:
+        a = tracer_network['A'].to_numpy(dtype=float)
+    else:
+        a = network_arrays.a
+
+    y = y_table.to_numpy()
+    x = y * a.astype(y.dtype, copy=False)
+
+    return pd.DataFrame(x, index=y_table.index, columns=y_table.columns, copy=False)
 
 
-def get_ye(y_table, tracer_network):
+def get_ye(y_table, tracer_network, network_arrays=None):
     """Calculate Ye from Y table
 
     Ye = sum(Z*X/A)
@@ -286,13 +490,19 @@ def get_ye(y_table, tracer_network):
     ----------
     y_table : pd.DataFrame
     tracer_network : pd.DataFrame
+    network_arrays : NetworkArrays
+        precomputed network arrays
     """
-    z = np.array(tracer_network['Z'])
-    zy = y_table.multiply(z)
-    return np.sum(zy, axis=1)
+    if network_arrays is None:
+        z = tracer_network['Z'].to_numpy(dtype=float)
+    else:
+        z = network_arrays.z
+
+    ye = y_table.to_numpy() @ z
+    return pd.Series(ye, index=y_table.index)
 
 
-def get_zbar(y_table, tracer_network, ye=None, abar=None):
+def get_zbar(y_table, tracer_network, ye=None, abar=None, network_arrays=None):
     """Calculate Zbar from Y table
 
     Zbar = Ye*Abar
@@ -305,9 +515,22 @@ def get_zbar(y_table, tracer_network, ye=None, abar=None):
     tracer_network : pd.DataFrame
     ye : 1d array
     abar : 1d array
+    network_arrays : NetworkArrays
+        precomputed network arrays
     """
+    if (ye is None) and (abar is None):
+        # Zbar = sum(Z*Y) / sum(Y), in one pass over Y
+        if network_arrays is None:
+            z = tracer_network['Z'].to_numpy(dtype=float)
+        else:
+            z = network_arrays.z
+
+        y = y_table.to_numpy()
+        zbar = (y @ z) / y.sum(axis=1, dtype=np.float64)
+        return pd.Series(zbar, index=y_table.index)
+
     if ye is None:
-        ye = get_ye(y_table, tracer_network)
+        ye = get_ye(y_table, tracer_network, network_arrays=network_arrays)
     if abar is None:
         abar = get_abar(y_table)
 
@@ -341,12 +564,14 @@ def get_sumy(y_table):
     ----------
     y_table : pd.DataFrame
     """
-    return np.sum(y_table, axis=1)
+    sumy = y_table.to_numpy().sum(axis=1, dtype=np.float64)
+    return pd.Series(sumy, index=y_table.index)
 
 
 # ===============================================================
 #                      strings
 # ===============================================================
+@functools.lru_cache(maxsize=None)
 def get_isotope_str(z, a):
     """Return string for given isotope
 
@@ -371,6 +596,38 @@ def get_isotope_str(z, a):
         return f'{element}{a}'
 
 
+def get_isotope_strs(z, a):
+    """Return array of strings for given isotopes
+        (vectorized version of get_isotope_str)
+
+    Returns : np.ndarray
+
+    parameters
+    ----------
+    z : [int]
+        atomic numbers
+    a : [int]
+        atomic masses
+    """
+    z = np.asarray(z)
+    a = np.asarray(a)
+
+    if (a < 1).any() or (z < 0).any():
+        raise ValueError('Invalid isotope')
+
+    element_strs = get_element_strs(z)
+    neutrons = (z == 0)
+
+    if (a[neutrons] != 1).any():  # special case for neutrons
+        raise ValueError('Invalid isotope')
+
+    iso_strs = element_strs + a.astype(str).astype(object)
+    iso_strs[neutrons] = element_strs[neutrons]
+
+    return iso_strs
+
+
+@functools.lru_cache(maxsize=None)
 def get_element_str(z):
     """Return string for given element
 
@@ -379,11 +636,39 @@ def get_element_str(z):
     z : int
         atomic number
     """
-    names = elements.elements
-    if z in names:
-        return names[z]
-    else:
-        raise ValueError(f'element with Z={z} not defined. Check config/elements.py')
+    element = elements.elements.get(z)  # also matches integral floats (e.g. 6.0)
+
+    if element is not None:
+        return element
+
+    raise ValueError(f'element with Z={z} not defined. Check config/elements.py')
+
+
+def get_element_strs(z):
+    """Return array of strings for given elements
+        (vectorized version of get_element_str)
+
+    Returns : np.ndarray
+
+    parameters
+    ----------
+    z : [int]
+        atomic numbers
+    """
+    z = np.asarray(z)
+    with np.errstate(invalid='ignore'):  # non-finite z are flagged below
+        z_int = z.astype(int)  # also accept integral floats (e.g. 6.0), as get_element_str
+    undefined = (z_int != z) | (z_int < 0) | (z_int >= len(_element_table))
+
+    if not undefined.any():
+        element_strs = _element_table[z_int]
+        undefined = np.equal(element_strs, None)
+
+        if not undefined.any():
+            return element_strs
+
+    z_bad = z[undefined][0]
+    raise ValueError(f'element with Z={z_bad} not defined. Check config/elements.py')
 
 
 def sums_table_name(abu_var, iso_group):
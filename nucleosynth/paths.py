@@ -1,6 +1,7 @@
 import os
 import sys
-import subprocess
+import shutil
+import functools
 
 # nucleosynth
 from nucleosynth.printing import printv
@@ -14,30 +15,35 @@ NUCLEOSYNTH
     path to this repository
 SKYNET
     path to skynet directory containing input/output folders
+
+These are read once, on first use
 """
 
+# tracer filename suffix of each skynet step
+_tracer_extensions = {1: '', 2: '_2'}
+
 
 # ===============================================================
 #                      Repo/meta
 # ===============================================================
+@functools.lru_cache(maxsize=None)
 def repo_path():
     """Return path to nucleosynth (this) repo
     """
-    try:
-        path = os.environ['NUCLEOSYNTH']
-    except KeyError:
+    path = os.environ.get('NUCLEOSYNTH')
+    if path is None:
         raise EnvironmentError('Environment variable NUCLEOSYNTH not set. '
                                'Set path to nucleosynth repo directory, e.g., '
                                "'export NUCLEOSYNTH=${HOME}/codes/nucleosynth'")
     return path
 
 
+@functools.lru_cache(maxsize=None)
 def skynet_path():
     """Return path to skynet directory
     """
-    try:
-        path = os.environ['SKYNET']
-    except KeyError:
+    path = os.environ.get('SKYNET')
+    if path is None:
         raise EnvironmentError('Environment variable SKYNET not set. '
                                'Set path to skynet directory, e.g., '
                                "'export SKYNET=${HOME}/skynet'")
@@ -61,6 +67,7 @@ def get_model_paths(model):
     return paths
 
 
+@functools.lru_cache(maxsize=64)
 def model_path(model, directory):
     """Return path to model output directory
 
@@ -86,11 +93,11 @@ def tracer_filename(tracer_id, tracer_step):
     tracer_step : 1 or 2
         the skynet step/stage (1st follows STIR, 2nd is free expansion)
     """
-    extensions = {1: '', 2: '_2'}
-    extension = extensions[tracer_step]
+    extension = _tracer_extensions[tracer_step]
     return f'{tracer_id}{extension}.h5'
 
 
+@functools.lru_cache(maxsize=4096)
 def tracer_filepath(tracer_id, tracer_step, model):
     """Return path to skynet tracer file
 
@@ -114,6 +121,7 @@ def stir_filename(tracer_id, model, extension='.dat'):
     return f'{model}_{tracer_id}{extension}'
 
 
+@functools.lru_cache(maxsize=4096)
 def stir_filepath(tracer_id, model):
     """Return filepath to STIR tracer
     """
@@ -125,6 +133,7 @@ def stir_filepath(tracer_id, model):
 # ===============================================================
 #                      Cache
 # ===============================================================
+@functools.lru_cache(maxsize=64)
 def model_cache_path(model):
     """Return path to temporary cache directory
 
@@ -136,6 +145,7 @@ def model_cache_path(model):
     return os.path.join(path, 'cache', model)
 
 
+@functools.lru_cache(maxsize=64)
 def tracer_cache_path(model):
     """Return path to temporary cache directory
 
@@ -159,6 +169,7 @@ def tracer_cache_filename(tracer_id, model, table_name):
     return f'{table_name}_{model}_tracer_{tracer_id}.pickle'
 
 
+@functools.lru_cache(maxsize=4096)
 def tracer_cache_filepath(tracer_id, model, table_name):
     """Return filename of columns cache
 
@@ -173,6 +184,33 @@ def tracer_cache_filepath(tracer_id, model, table_name):
     return os.path.join(path, filename)
 
 
+@functools.lru_cache(maxsize=64)
+def rechunked_path(model):
+    """Return path to directory of rechunked tracer files
+
+    parameters
+    ----------
+    model : str
+    """
+    path = model_cache_path(model)
+    return os.path.join(path, 'rechunked')
+
+
+@functools.lru_cache(maxsize=4096)
+def rechunked_filepath(tracer_id, tracer_step, model):
+    """Return path to rechunked copy of skynet tracer file
+
+    parameters
+    ----------
+    tracer_id : int
+    tracer_step : 1 or 2
+    model : str
+    """
+    path = rechunked_path(model)
+    filename = tracer_filename(tracer_id, tracer_step)
+    return os.path.join(path, filename)
+
+
 # ===============================================================
 #              Misc.
 # ===============================================================
@@ -188,7 +226,7 @@ def try_mkdir(path, skip=False, verbose=True):
         if skip=false, will ask to overwrite an existing directory
     verbose : bool
     """
-    printv(f'Creating directory  {path}', verbose)
+    printv(lambda: f'Creating directory  {path}', verbose)
     if os.path.exists(path):
         if skip:
             printv('Directory already exists', verbose)
@@ -197,10 +235,10 @@ def try_mkdir(path, skip=False, verbose=True):
             cont = input('Overwrite (DESTROY)? (y/[n]): ')
 
             if cont == 'y' or cont == 'Y':
-                subprocess.run(['rm', '-r', path])
-                subprocess.run(['mkdir', path])
+                shutil.rmtree(path)
+                os.makedirs(path)
             else:
                 sys.exit()
     else:
-        subprocess.run(['mkdir', '-p', path], check=True)
+        os.makedirs(path, exist_ok=True)
 
@@ -8,6 +8,9 @@ class Plotter:
     """
     Handles axis properties
     """
+    __slots__ = ('fig', 'ax', 'y_var', 'x_var', 'y_scale', 'x_scale',
+                 'xlabel', 'ylabel', 'xlims', 'ylims', 'legend', 'legend_loc',
+                 'title', 'title_str', 'figsize')
 
     def __init__(self, ax, set_all=True,
                  y_var=None, x_var=None,
@@ -1,4 +1,5 @@
-import numpy as np
+import re
+import matplotlib
 import matplotlib.pyplot as plt
 
 # nucleosynth
@@ -8,6 +9,14 @@ from .config import plot_config
 General functions for plotting
 """
 
+# keyword for symlog threshold (renamed from linthreshx in matplotlib 3.3)
+if hasattr(matplotlib, '__version_info__'):
+    _mpl_version = tuple(matplotlib.__version_info__[:2])
+else:  # only leading digits, to allow e.g. '3.3rc1' or '3.1.0+dev'
+    _mpl_version = tuple(int(v) for v in
+                         re.match(r'(\d+)\.(\d+)', matplotlib.__version__).groups())
+_linthresh_key = 'linthresh' if _mpl_version >= (3, 3) else 'linthreshx'
+
 
 def setup_subplots(n_sub, max_cols=1, sub_figsize=(6, 5), **kwargs):
     """Constructs fig for given number of subplots
@@ -25,8 +34,8 @@ def setup_subplots(n_sub, max_cols=1, sub_figsize=(6, 5), **kwargs):
     **kwargs :
         args to be parsed to plt.subplots()
     """
-    n_rows = int(np.ceil(n_sub / max_cols))
-    n_cols = {False: 1, True: max_cols}.get(n_sub > 1)
+    n_rows = -(-n_sub // max_cols)  # ceiling division
+    n_cols = max_cols if n_sub > 1 else 1
     figsize = (n_cols * sub_figsize[0], n_rows * sub_figsize[1])
 
     return plt.subplots(n_rows, n_cols, figsize=figsize, **kwargs)
@@ -106,7 +115,11 @@ def set_ax_scales(ax, y_var=None, x_var=None, y_scale=None, x_scale=None):
     if y_scale is None:
         y_scale = plot_config.ax_scales.get(y_var, 'log')
 
-    ax.set_xscale(x_scale, linthreshx=10)
+    if x_scale == 'symlog':
+        ax.set_xscale(x_scale, **{_linthresh_key: 10})
+    else:
+        ax.set_xscale(x_scale)
+
     ax.set_yscale(y_scale)
 
 
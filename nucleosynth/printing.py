@@ -8,10 +8,15 @@ def printv(string, verbose, **kwargs):
 
     parameters
     ----------
-    string : str
+    string : str or callable
+        if callable, is only called (to build the string) if verbose is True,
+        e.g. lambda: f'value: {x}'
     verbose : bool
     """
     if verbose:
+        if callable(string):
+            string = string()
+
         print(string, **kwargs)
 
 
@@ -1,10 +1,12 @@
 from . import tracer
 from . import load_save
 from . import extract_hdf5
+from . import lazy_columns
 from . import tracer_tools
 
 __all__ = ['tracer',
            'load_save',
            'extract_hdf5',
+           'lazy_columns',
            'tracer_tools',
            ]
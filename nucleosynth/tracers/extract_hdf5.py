@@ -1,5 +1,8 @@
+import zlib
+import itertools
 import numpy as np
 import pandas as pd
+import h5py
 
 # nucleosynth
 from nucleosynth.config import tables_config
@@ -23,21 +26,49 @@ def extract_columns(tracer_file, columns=None):
     tracer_file : h5py.File
     columns : [str]
     """
-    table = pd.DataFrame()
-
     if columns is None:
         columns = tables_config.columns
 
-    for column in columns:
-        col_low = column.lower()
-        table[col_low] = tracer_file[column]
+    n_rows = len(tracer_file[columns[0]])
+    data = np.empty((n_rows, len(columns)), dtype=np.float64)
+
+    # read back-to-back in order of file offset, to keep disk access sequential
+    read_order = sorted(range(len(columns)),
+                        key=lambda i: dataset_offset(tracer_file[columns[i]]))
+
+    # read each column directly into its slot of the shared array
+    for i in read_order:
+        column = columns[i]
+        tracer_file[column].read_direct(data, dest_sel=np.s_[:, i])
 
         # rescale if needed
-        scale = tables_config.column_scales.get(col_low)
+        scale = tables_config.column_scales.get(column.lower())
         if scale is not None:
-            table[col_low] *= scale
+            data[:, i] *= scale
+
+    col_names = [column.lower() for column in columns]
+    return pd.DataFrame(data, columns=col_names, copy=False)
+
+
+def extract_column(tracer_file, column):
+    """Extract single column from a skynet output file
 
-    return table
+    Returns : np.ndarray
+
+    parameters
+    ----------
+    tracer_file : h5py.File
+    column : str
+        name of column in skynet file (e.g. 'Time')
+    """
+    data = read_dataset(tracer_file, key=column)
+
+    # rescale if needed
+    scale = tables_config.column_scales.get(column.lower())
+    if scale is not None:
+        data *= scale
+
+    return data
 
 
 # ===============================================================
@@ -50,32 +81,199 @@ def extract_network(tracer_file):
     ----------
     tracer_file : h5py.File
     """
-    tracer_network = pd.DataFrame()
-    iso_list = []
-
-    for key in ['Z', 'A']:
-        tracer_network[key] = np.array(tracer_file[key], dtype=int)
+    z = read_dataset(tracer_file, key='Z')
+    a = read_dataset(tracer_file, key='A')
 
-    for i in range(len(tracer_network)):
-        row = tracer_network.loc[i]
-        iso_str = network.get_isotope_str(z=row['Z'], a=row['A'])
-        iso_list += [iso_str]
-
-    tracer_network['isotope'] = iso_list
-    return tracer_network[['isotope', 'Z', 'A']]
+    return network.get_tracer_network(z=z, a=a)
 
 
 # ===============================================================
 #              Y
 # ===============================================================
-def extract_y(tracer_file, tracer_network):
+def extract_y(tracer_file, tracer_network, lazy=False):
     """Extract table of isotopic abundances (Y) from skynet tracer file
 
     parameters
     ----------
     tracer_file : h5py.File
     tracer_network : pd.DataFrame
+    lazy : bool
+        if Y is stored contiguously and uncompressed, return a read-only table
+        memory-mapped to the file, so values are only read when accessed.
+        Otherwise, read the full dataset as usual
+    """
+    y = None
+
+    if lazy:
+        dset = tracer_file['Y']
+        offset = dset.id.get_offset()
+        n_filters = dset.id.get_create_plist().get_nfilters()
+
+        if (offset is not None) and (n_filters == 0):
+            y = np.memmap(tracer_file.filename, dtype=dset.dtype, mode='r',
+                          offset=offset, shape=dset.shape)
+    if y is None:
+        y = read_dataset(tracer_file, key='Y')
+
+    isotopes = tracer_network['isotope'].to_numpy()
+
+    return pd.DataFrame(y, columns=isotopes, copy=False)
+
+
+def extract_y_slice(tracer_file, tracer_network, steps=None, isotopes=None):
+    """Extract subset of isotopic abundances (Y) from skynet tracer file
+
+    If Y is chunked, reads whole chunks directly (see read_direct_chunks),
+    avoiding HDF5's slow element-wise path for misaligned selections
+
+    Returns : pd.DataFrame
+
+    parameters
+    ----------
+    tracer_file : h5py.File
+    tracer_network : pd.DataFrame
+    steps : slice
+        range of timesteps (rows) to extract. Defaults to all
+    isotopes : slice
+        range of isotopes (columns, in network order) to extract. Defaults to all
+    """
+    if steps is None:
+        steps = slice(None)
+    if isotopes is None:
+        isotopes = slice(None)
+
+    dset = tracer_file['Y']
+    y = read_direct_chunks(dset, selection=(steps, isotopes))
+    columns = tracer_network['isotope'].to_numpy()[isotopes]
+    index = range(*steps.indices(dset.shape[0]))
+
+    return pd.DataFrame(y, index=index, columns=columns, copy=False)
+
+
+# ===============================================================
+#              Misc.
+# ===============================================================
+def read_dataset(tracer_file, key):
+    """Read full dataset directly into a new array,
+        avoiding the intermediate copy of h5py's default slicing
+
+    Returns : np.ndarray
+
+    parameters
+    ----------
+    tracer_file : h5py.File
+    key : str
+        name of dataset
     """
-    y_table = pd.DataFrame(tracer_file['Y'])
-    y_table.columns = list(tracer_network['isotope'])
-    return y_table
+    dset = tracer_file[key]
+    buf = np.empty(dset.shape, dtype=dset.dtype)
+    dset.read_direct(buf)
+    return buf
+
+
+def dataset_offset(dset):
+    """Return sort key for the byte offset of a dataset within its file
+
+    Chunked (or unallocated) datasets have no single offset,
+    and are sorted after contiguous ones
+
+    parameters
+    ----------
+    dset : h5py.Dataset
+    """
+    offset = dset.id.get_offset()
+
+    if offset is None:
+        return True, 0
+    else:
+        return False, offset
+
+
+def read_direct_chunks(dset, selection):
+    """Read a hyperslab of a chunked dataset one raw chunk at a time
+
+    Each chunk overlapping the selection is read with
+    DatasetID.read_direct_chunk(), decompressed here if needed,
+    then copied into the output array.
+    Falls back to regular slicing for contiguous datasets, or for filters
+    other than gzip, or if read_direct_chunk() isn't available
+
+    Returns : np.ndarray
+
+    parameters
+    ----------
+    dset : h5py.Dataset
+    selection : (slice,)
+        one slice per dimension (step must be 1)
+    """
+    if not can_read_direct_chunks(dset):
+        return dset[selection]
+
+    bounds = []
+    for sel, length in zip(selection, dset.shape):
+        start, stop, step = sel.indices(length)
+        if step != 1:
+            raise ValueError('slice step must be 1')
+        bounds += [(start, max(start, stop))]
+
+    out = np.empty([stop - start for start, stop in bounds], dtype=dset.dtype)
+
+    if out.size == 0:
+        return out
+
+    # chunk grid coordinates overlapping the selection, for each dimension
+    chunk_ranges = [range(start // size, (stop - 1) // size + 1)
+                    for (start, stop), size in zip(bounds, dset.chunks)]
+
+    for chunk_idx in itertools.product(*chunk_ranges):
+        chunk_offset = tuple(i * size for i, size in zip(chunk_idx, dset.chunks))
+        chunk = read_chunk(dset, chunk_offset=chunk_offset)
+
+        src = []
+        dest = []
+        for (start, stop), offset, size in zip(bounds, chunk_offset, dset.chunks):
+            lo = max(start, offset)
+            hi = min(stop, offset + size)
+            src += [slice(lo - offset, hi - offset)]
+            dest += [slice(lo - start, hi - start)]
+
+        out[tuple(dest)] = chunk[tuple(src)]
+
+    return out
+
+
+def read_chunk(dset, chunk_offset):
+    """Read and decompress a single raw chunk of a dataset
+
+    Returns : np.ndarray
+        with full chunk shape (edge chunks include fill values)
+
+    parameters
+    ----------
+    dset : h5py.Dataset
+    chunk_offset : (int,)
+        dataset coordinates of the chunk's first element
+    """
+    filter_mask, raw = dset.id.read_direct_chunk(chunk_offset)
+
+    # bit set in filter_mask means the filter was skipped for this chunk
+    if (dset.compression == 'gzip') and not (filter_mask & 1):
+        raw = zlib.decompress(raw)
+
+    return np.frombuffer(raw, dtype=dset.dtype).reshape(dset.chunks)
+
+
+def can_read_direct_chunks(dset):
+    """Return True if raw chunks of dataset can be decoded by read_chunk()
+
+    parameters
+    ----------
+    dset : h5py.Dataset
+    """
+    if (dset.chunks is None) or not hasattr(dset.id, 'read_direct_chunk'):
+        return False
+
+    dcpl = dset.id.get_create_plist()
+    filters = [dcpl.get_filter(i)[0] for i in range(dcpl.get_nfilters())]
+
+    return all(f == h5py.h5z.FILTER_DEFLATE for f in filters)
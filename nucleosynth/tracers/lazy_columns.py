@@ -0,0 +1,69 @@
+import pandas as pd
+
+# nucleosynth
+from nucleosynth.tracers import extract_hdf5
+from nucleosynth.config import tables_config
+
+"""
+Class for lazily loading tracer columns from a raw hdf5 skynet file
+"""
+
+
+class LazyColumns:
+    """Table of tracer columns, each only read from file when first accessed
+
+    Columns are accessed by lowercase name (as in extract_hdf5.extract_columns),
+    e.g. lazy_columns['time'], and kept in memory once read
+
+    attributes
+    ----------
+    columns : [str]
+        lowercase names of available columns
+    tracer_file : h5py.File
+        Raw hdf5 tracer output file from skynet (kept open)
+    """
+
+    def __init__(self, tracer_file, columns=None):
+        """
+        parameters
+        ----------
+        tracer_file : h5py.File
+        columns : [str]
+            names of columns in skynet file (e.g. 'Time')
+        """
+        if columns is None:
+            columns = tables_config.columns
+
+        self.tracer_file = tracer_file
+        self.columns = [column.lower() for column in columns]
+
+        self._file_keys = dict(zip(self.columns, columns))
+        self._loaded = {}
+
+    def __getitem__(self, column):
+        if column not in self._loaded:
+            if column not in self._file_keys:
+                raise KeyError(f"column '{column}' not in tracer columns")
+
+            self._loaded[column] = extract_hdf5.extract_column(
+                                            self.tracer_file,
+                                            column=self._file_keys[column])
+
+        return self._loaded[column]
+
+    def __contains__(self, column):
+        return column in self._file_keys
+
+    def __iter__(self):
+        return iter(self.columns)
+
+    def __len__(self):
+        return len(self.columns)
+
+    def to_frame(self):
+        """Read all columns and return as table
+
+        Returns : pd.DataFrame
+        """
+        data = {column: self[column] for column in self.columns}
+        return pd.DataFrame(data, copy=False)
@@ -1,10 +1,15 @@
+import os
+import pickle
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 import numpy as np
 import pandas as pd
 import h5py
 
 # nucleosynth
 from nucleosynth import paths, network, tools
-from nucleosynth.tracers import extract_hdf5
+from nucleosynth.tracers import extract_hdf5, lazy_columns
 from nucleosynth.printing import printv
 from nucleosynth.config import tables_config
 
@@ -12,12 +17,17 @@ from nucleosynth.config import tables_config
 Functions for loading/saving tracer data
 """
 
+# already-open hdf5 files: {filepath: (file identity, h5py.File)} (see open_file)
+_open_files = OrderedDict()
+_open_files_lock = threading.Lock()
+_open_files_maxsize = 64
+
 
 # ===============================================================
 #              Loading/extracting tables
 # ===============================================================
-def load_files(tracer_id, model, tracer_steps,
-               tracer_files=None, verbose=True):
+def load_files(tracer_id, model, tracer_steps, tracer_files=None,
+               rechunk=False, chunk_cache=None, reload=False, verbose=True):
     """Load multiple skynet tracer files
 
     parameters
@@ -25,47 +35,161 @@ def load_files(tracer_id, model, tracer_steps,
     tracer_id : int
     tracer_steps : [int]
     model : str
-    tracer_files : h5py.File
+    tracer_files : {h5py.File}
+        already-open files. Any that are missing or closed are (re-)opened
+    rechunk : bool
+    chunk_cache : {}
+        hdf5 chunk cache settings (see open_file)
+    reload : bool
+        re-open files, instead of reusing already-open handles
     verbose : bool
     """
     if tracer_files is None:
         tracer_files = {}
+    else:
+        tracer_files = dict(tracer_files)
 
-        for step in tracer_steps:
-            tracer_files[step] = load_file(tracer_id, tracer_step=step,
-                                           model=model, verbose=verbose)
-
+    for step in tracer_steps:
+        tracer_files[step] = load_file(tracer_id, tracer_step=step,
+                                       model=model,
+                                       tracer_file=tracer_files.get(step),
+                                       rechunk=rechunk, chunk_cache=chunk_cache,
+                                       reload=reload, verbose=verbose)
     return tracer_files
 
 
-def load_file(tracer_id, tracer_step, model, tracer_file=None, verbose=True):
+def load_file(tracer_id, tracer_step, model, tracer_file=None,
+              rechunk=False, chunk_cache=None, reload=False, verbose=True):
     """Load skynet tracer hdf5 file
 
+    If an up-to-date rechunked copy exists (see rechunk_file), load that instead.
+    Only looked for if rechunk=True, or the model has a rechunked directory
+
     parameters
     ----------
     tracer_id : int
     tracer_step : 1 or 2
     model : str
     tracer_file : h5py.File
-        if tracer_file provided, simply return
+        if tracer_file provided (and still open), simply return
+    rechunk : bool
+        create rechunked copy of file, if it doesn't exist yet
+    chunk_cache : {}
+        hdf5 chunk cache settings (see open_file)
+    reload : bool
+        re-open file, instead of reusing an already-open handle
     verbose : bool
     """
-    if tracer_file is None:
+    if not tracer_file:  # None, or closed (see open_file)
         filepath = paths.tracer_filepath(tracer_id, tracer_step, model=model)
-        printv(f'Loading tracer file: {filepath}', verbose=verbose)
-        tracer_file = h5py.File(filepath, 'r')
+
+        if rechunk or rechunked_path_exists(model):
+            if rechunk and not rechunked_is_current(tracer_id, tracer_step, model):
+                rechunk_file(tracer_id, tracer_step=tracer_step, model=model,
+                             verbose=verbose)
+
+            if rechunked_is_current(tracer_id, tracer_step, model):
+                filepath = paths.rechunked_filepath(tracer_id, tracer_step,
+                                                    model=model)
+
+        printv(lambda: f'Loading tracer file: {filepath}', verbose=verbose)
+        tracer_file = open_file(filepath, chunk_cache=chunk_cache, reuse=not reload)
+
+    return tracer_file
+
+
+def open_file(filepath, chunk_cache=None, reuse=True):
+    """Open hdf5 file for reading, reusing the handle if already open
+
+    Handles for the most recent files are kept, so repeated loads
+    don't pay for re-opening and re-parsing the file metadata.
+
+    A handle is closed when its file is re-opened, i.e. if reuse=False,
+    or if the file has since been rewritten or replaced (changed mtime or inode),
+    as HDF5 would otherwise keep using the stale file metadata.
+    The oldest handle is also closed once more than _open_files_maxsize
+    files are open, so this must exceed the number of files in concurrent use
+
+    Returns : h5py.File
+
+    parameters
+    ----------
+    filepath : str
+    chunk_cache : {}
+        hdf5 chunk cache settings passed to h5py.File
+        (rdcc_nbytes, rdcc_nslots, rdcc_w0), overriding tables_config.chunk_cache.
+        Only applies if the file isn't already open
+    reuse : bool
+        reuse handle if already open. If False, always re-open the file
+    """
+    cache_kwargs = dict(tables_config.chunk_cache)
+    if chunk_cache is not None:
+        cache_kwargs.update(chunk_cache)
+
+    stat = os.stat(filepath)
+    identity = (stat.st_mtime_ns, stat.st_ino)
+
+    with _open_files_lock:
+        if filepath in _open_files:
+            cached_identity, tracer_file = _open_files.pop(filepath)
+
+            if reuse and tracer_file and (cached_identity == identity):
+                _open_files[filepath] = (identity, tracer_file)
+                return tracer_file
+
+            if tracer_file:  # stale, or reuse=False
+                tracer_file.close()
+
+        tracer_file = h5py.File(filepath, 'r', **cache_kwargs)
+        _open_files[filepath] = (identity, tracer_file)
+
+        if len(_open_files) > _open_files_maxsize:
+            _, (_, oldest_file) = _open_files.popitem(last=False)
+
+            if oldest_file:
+                oldest_file.close()
 
     return tracer_file
 
 
+def close_files():
+    """Close all hdf5 files opened by open_file()
+    """
+    with _open_files_lock:
+        for _, tracer_file in _open_files.values():
+            if tracer_file:
+                tracer_file.close()
+
+        _open_files.clear()
+
+
+def load_lazy_columns(tracer_id, tracer_step, model, columns=None, verbose=True):
+    """Load columns table of a single skynet file, lazily reading
+        each column on first access
+
+    Returns : LazyColumns
+
+    parameters
+    ----------
+    tracer_id : int
+    tracer_step : int
+    model : str
+    columns : [str]
+    verbose : bool
+    """
+    tracer_file = load_file(tracer_id, tracer_step=tracer_step, model=model,
+                            verbose=verbose)
+    return lazy_columns.LazyColumns(tracer_file, columns=columns)
+
+
 def load_table(tracer_id, model, table_name, tracer_steps,
                columns=None, tracer_files=None, tracer_network=None,
-               y_table=None, reload=False, save=True, verbose=True):
+               y_table=None, reload=False, save=True, lazy=False, verbose=True):
     """Wrapper function for loading various tracer tables
 
     Main steps:
         1. Try to load from cache
-        2. If no cache, re-extract from file
+        2. If no cache (or cache older than raw files), re-extract from file
         3. Save new table to cache (if save=True)
 
     Returns : pd.DataFrame
@@ -88,36 +212,80 @@ def load_table(tracer_id, model, table_name, tracer_steps,
         Force reload from raw skynet file
     save : bool
         save extracted table to cache
+    lazy : bool
+        memory-map Y from raw file, if stored contiguously (see extract_hdf5.extract_y).
+        Only applies when extracting a single step, as joining steps reads them
     verbose : bool
     """
-    printv(f'Loading {table_name} table', verbose=verbose)
+    printv(lambda: f'Loading {table_name} table', verbose=verbose)
     table = None
+    stale = False
 
     if table_name not in ['columns', 'network', 'X', 'Y']:
         raise ValueError('table_name must be one of: columns, X, Y')
 
     if not reload:
-        try:
-            table = load_table_cache(tracer_id, model, table_name, verbose=verbose)
-        except FileNotFoundError:
+        if not cache_exists(tracer_id, model=model, table_name=table_name):
             printv('cache not found', verbose)
+        elif cache_is_stale(tracer_id, model=model, table_name=table_name,
+                            tracer_steps=tracer_steps):
+            printv('cache out of date', verbose)
+            stale = True
+        else:
+            table = load_table_cache(tracer_id, model, table_name, verbose=verbose)
 
     if table is None:
-        printv(f'Reloading and joining {table_name} tables', verbose)
+        printv(lambda: f'Reloading and joining {table_name} tables', verbose)
+
+        if stale:  # raw files have changed, so don't trust already-open handles
+            tracer_files = None
 
         table = extract_table(tracer_id, tracer_steps=tracer_steps, model=model,
                               table_name=table_name, columns=columns,
                               tracer_network=tracer_network, y_table=y_table,
-                              tracer_files=tracer_files, verbose=verbose)
+                              tracer_files=tracer_files, reload=reload or stale,
+                              lazy=lazy, verbose=verbose)
         if save:
             save_table_cache(table, tracer_id, model, table_name, verbose=verbose)
 
     return table
 
 
+def load_tables(tracer_ids, model, table_name, tracer_steps,
+                columns=None, n_workers=8, reload=False, save=True):
+    """Load the same table for multiple tracers, using a pool of threads
+
+    HDF5 reads, unpickling and numpy copies mostly run outside the GIL,
+    so separate tracer files can be loaded concurrently
+
+    Returns : {tracer_id: pd.DataFrame}
+
+    parameters
+    ----------
+    tracer_ids : [int]
+    model : str
+    table_name : one of ('columns', 'X', 'Y', 'network')
+    tracer_steps : [int]
+    columns : [str]
+    n_workers : int
+        max number of threads
+    reload : bool
+    save : bool
+    """
+    def load(tracer_id):
+        return load_table(tracer_id, model=model, table_name=table_name,
+                          tracer_steps=tracer_steps, columns=columns,
+                          reload=reload, save=save, verbose=False)
+
+    with ThreadPoolExecutor(max_workers=n_workers) as executor:
+        tables = executor.map(load, tracer_ids)
+
+        return dict(zip(tracer_ids, tables))
+
+
 def extract_table(tracer_id, tracer_steps, model, table_name, columns=None,
                   tracer_files=None, tracer_network=None, y_table=None,
-                  verbose=True):
+                  reload=False, lazy=False, verbose=True):
     """Wrapper for various table extract functions
 
     Returns : pd.DataFrame
@@ -132,6 +300,11 @@ def extract_table(tracer_id, tracer_steps, model, table_name, columns=None,
     tracer_files : {h5py.File}
     tracer_network : pd.DataFrame
     y_table : pd.DataFrame
+    reload : bool
+        re-open raw files (if not provided), instead of reusing open handles
+    lazy : bool
+        memory-map Y from raw file, if stored contiguously (see extract_hdf5.extract_y).
+        Only applies when extracting a single step, as joining steps reads them
     verbose : bool
     """
     step_tables = []
@@ -140,7 +313,8 @@ def extract_table(tracer_id, tracer_steps, model, table_name, columns=None,
         columns = tables_config.columns
 
     tracer_files = load_files(tracer_id, model=model, tracer_steps=tracer_steps,
-                              tracer_files=tracer_files, verbose=verbose)
+                              tracer_files=tracer_files, reload=reload,
+                              verbose=verbose)
 
     if tracer_network is None:
         tracer_network = extract_hdf5.extract_network(tracer_files[tracer_steps[0]])
@@ -153,7 +327,8 @@ def extract_table(tracer_id, tracer_steps, model, table_name, columns=None,
             y_table = extract_table(tracer_id, tracer_steps=tracer_steps,
                                     model=model, table_name='Y',
                                     tracer_files=tracer_files,
-                                    tracer_network=tracer_network, verbose=verbose)
+                                    tracer_network=tracer_network, lazy=lazy,
+                                    verbose=verbose)
 
         return network.get_x(y_table, tracer_network=tracer_network)
 
@@ -164,14 +339,20 @@ def extract_table(tracer_id, tracer_steps, model, table_name, columns=None,
             table = extract_hdf5.extract_columns(tracer_file, columns=columns)
 
         elif table_name == 'Y':
-            table = extract_hdf5.extract_y(tracer_file, tracer_network=tracer_network)
+            table = extract_hdf5.extract_y(tracer_file, tracer_network=tracer_network,
+                                           lazy=lazy)
 
         else:
             raise ValueError('table_name must be one of (network, columns, X, Y)')
 
         step_tables += [table]
 
-    return pd.concat(step_tables, ignore_index=True)
+    if len(step_tables) == 1:
+        return step_tables[0]
+
+    # all steps share the same (single-dtype) columns, so join raw arrays
+    data = np.concatenate([table.to_numpy() for table in step_tables])
+    return pd.DataFrame(data, columns=step_tables[0].columns, copy=False)
 
 
 # ===============================================================
@@ -179,7 +360,7 @@ def extract_table(tracer_id, tracer_steps, model, table_name, columns=None,
 # ===============================================================
 def load_composition(tracer_id, tracer_steps, model,
                      tracer_files=None, tracer_network=None,
-                     reload=False, save=True, verbose=True):
+                     reload=False, save=True, lazy=False, verbose=True):
     """Wrapper function to load both composition tables (X, Y)
 
     Returns : {abu_var: pd.DataFrame}
@@ -193,6 +374,8 @@ def load_composition(tracer_id, tracer_steps, model,
     tracer_network : pd.DataFrame
     reload : bool
     save : bool
+    lazy : bool
+        memory-map Y from raw file, if possible (see load_table)
     verbose : bool
     """
     composition = {}
@@ -205,13 +388,13 @@ def load_composition(tracer_id, tracer_steps, model,
                                           table_name=abu_var,
                                           tracer_network=tracer_network,
                                           save=save, reload=reload,
-                                          verbose=verbose)
+                                          lazy=lazy, verbose=verbose)
     return composition
 
 
 def load_sums(tracer_id, tracer_steps, model,
               tracer_files=None, tracer_network=None, composition=None,
-              reload=False, save=True, verbose=True):
+              network_arrays=None, reload=False, save=True, verbose=True):
     """Wrapper function to load all composition sum tables
 
     Returns : {iso_group {abu_var: pd.DataFrame}}
@@ -224,23 +407,23 @@ def load_sums(tracer_id, tracer_steps, model,
     tracer_files : {tracer_step: h5py.File}
     tracer_network : pd.DataFrame
     composition : {abu_var: pd.DataFrame}
+    network_arrays : network.NetworkArrays
     reload : bool
     save : bool
     verbose : bool
     """
-    printv(f'Loading composition sum tables', verbose=verbose)
+    printv('Loading composition sum tables', verbose=verbose)
     sums = None
 
     if not reload:
-        try:
-            sums = load_sums_cache(tracer_id, model=model, verbose=verbose)
-        except FileNotFoundError:
-            printv('cache not found', verbose)
+        sums = load_sums_cache(tracer_id, model=model,
+                               tracer_steps=tracer_steps, verbose=verbose)
 
     if sums is None:
-        printv(f'Calculating sums', verbose)
+        printv('Calculating sums', verbose)
         tracer_files = load_files(tracer_id, tracer_steps=tracer_steps, model=model,
-                                  tracer_files=tracer_files, verbose=verbose)
+                                  tracer_files=tracer_files, reload=reload,
+                                  verbose=verbose)
 
         if composition is None:
             composition = load_composition(tracer_id, tracer_steps=tracer_steps,
@@ -254,7 +437,8 @@ def load_sums(tracer_id, tracer_steps, model,
                                         tracer_files=tracer_files, reload=reload,
                                         save=save, verbose=verbose)
 
-        sums = network.get_all_sums(composition, tracer_network=tracer_network)
+        sums = network.get_all_sums(composition, tracer_network=tracer_network,
+                                    network_arrays=network_arrays)
 
         if save:
             save_sums_cache(tracer_id, model=model,
@@ -281,15 +465,18 @@ def save_sums_cache(tracer_id, model, sums, verbose=True):
                              table_name=table_name, verbose=verbose)
 
 
-def load_sums_cache(tracer_id, model, verbose=True):
+def load_sums_cache(tracer_id, model, tracer_steps=None, verbose=True):
     """Load composition sum tables from cache
 
     Returns : {iso_group: {abu_var: pd.DataFrame}}
+        or None, if any cached table is missing or out of date
 
     parameters
     ----------
     tracer_id : int
     model : str
+    tracer_steps : [int]
+        if provided, check cache isn't older than raw tracer files
     verbose : bool
     """
     sums = {'A': {}, 'Z': {}}
@@ -298,6 +485,16 @@ def load_sums_cache(tracer_id, model, verbose=True):
         for abu_var in ['X', 'Y']:
             table_name = network.sums_table_name(abu_var, iso_group=iso_group)
 
+            if not cache_exists(tracer_id, model=model, table_name=table_name):
+                printv('cache not found', verbose)
+                return None
+
+            if tracer_steps is not None:
+                if cache_is_stale(tracer_id, model=model, table_name=table_name,
+                                  tracer_steps=tracer_steps):
+                    printv('cache out of date', verbose)
+                    return None
+
             table = load_table_cache(tracer_id=tracer_id, model=model,
                                      table_name=table_name, verbose=verbose)
             sums[iso_group][abu_var] = table
@@ -360,6 +557,88 @@ def get_stir_mass_element(tracer_id, model):
     return mass
 
 
+# ===============================================================
+#              Rechunked files
+# ===============================================================
+def rechunk_file(tracer_id, tracer_step, model, verbose=True):
+    """Save copy of skynet tracer file with layout suited to full-table reads
+
+    Column datasets are stored contiguously, and Y is split into
+    uncompressed chunks of whole rows (all isotopes).
+    All other datasets/groups are copied unchanged
+
+    parameters
+    ----------
+    tracer_id : int
+    tracer_step : 1 or 2
+    model : str
+    verbose : bool
+    """
+    filepath = paths.tracer_filepath(tracer_id, tracer_step, model=model)
+    rechunked_filepath = paths.rechunked_filepath(tracer_id, tracer_step, model=model)
+    tmp_filepath = f'{rechunked_filepath}.tmp'
+
+    paths.try_mkdir(paths.rechunked_path(model), skip=True, verbose=verbose)
+    printv(lambda: f'Rechunking tracer file: {filepath}', verbose)
+
+    with h5py.File(filepath, 'r') as src, h5py.File(tmp_filepath, 'w') as dest:
+        for key, value in src.attrs.items():
+            dest.attrs[key] = value
+
+        for key in src:
+            if key in tables_config.columns:
+                dest.create_dataset(key, data=extract_hdf5.read_dataset(src, key=key))
+
+            elif key == 'Y':
+                y = extract_hdf5.read_dataset(src, key=key)
+                row_bytes = max(y[:1].nbytes, 1)
+                n_rows = max(1, min(len(y), tables_config.rechunk_y_bytes // row_bytes))
+                dest.create_dataset(key, data=y, chunks=(n_rows,) + y.shape[1:])
+            else:
+                src.copy(src[key], dest, name=key)
+
+    os.replace(tmp_filepath, rechunked_filepath)
+
+
+def rechunked_path_exists(model):
+    """Return True if model has a directory of rechunked tracer files
+
+    Returns False if NUCLEOSYNTH isn't set, as there's no cache directory
+
+    parameters
+    ----------
+    model : str
+    """
+    try:
+        path = paths.rechunked_path(model)
+    except EnvironmentError:
+        return False
+
+    return os.path.isdir(path)
+
+
+def rechunked_is_current(tracer_id, tracer_step, model):
+    """Return True if rechunked copy of tracer file exists,
+        and isn't older than the original
+
+    parameters
+    ----------
+    tracer_id : int
+    tracer_step : 1 or 2
+    model : str
+    """
+    filepath = paths.tracer_filepath(tracer_id, tracer_step, model=model)
+    rechunked_filepath = paths.rechunked_filepath(tracer_id, tracer_step, model=model)
+
+    if not os.path.exists(rechunked_filepath):
+        return False
+
+    if os.path.exists(filepath):
+        return os.path.getmtime(rechunked_filepath) >= os.path.getmtime(filepath)
+    else:
+        return True
+
+
 # ===============================================================
 #              Cache
 # ===============================================================
@@ -376,8 +655,8 @@ def save_table_cache(table, tracer_id, model, table_name, verbose=True):
     """
     check_cache_path(model, verbose=verbose)
     filepath = paths.tracer_cache_filepath(tracer_id, model, table_name=table_name)
-    printv(f'Saving table to cache: {filepath}', verbose)
-    table.to_pickle(filepath)
+    printv(lambda: f'Saving table to cache: {filepath}', verbose)
+    table.to_pickle(filepath, protocol=pickle.HIGHEST_PROTOCOL)
 
 
 def load_table_cache(tracer_id, model, table_name, verbose=True):
@@ -391,10 +670,48 @@ def load_table_cache(tracer_id, model, table_name, verbose=True):
     verbose : bool
     """
     filepath = paths.tracer_cache_filepath(tracer_id, model, table_name=table_name)
-    printv(f'Loading table from cache: {filepath}', verbose)
+    printv(lambda: f'Loading table from cache: {filepath}', verbose)
     return pd.read_pickle(filepath)
 
 
+def cache_exists(tracer_id, model, table_name):
+    """Return True if cached table file exists
+
+    parameters
+    ----------
+    tracer_id : int
+    model : str
+    table_name : str
+    """
+    filepath = paths.tracer_cache_filepath(tracer_id, model, table_name=table_name)
+    return os.path.exists(filepath)
+
+
+def cache_is_stale(tracer_id, model, table_name, tracer_steps):
+    """Return True if cached table is older than any of the raw tracer files
+
+    Raw files that don't exist are ignored (e.g. if only the cache is kept)
+
+    parameters
+    ----------
+    tracer_id : int
+    model : str
+    table_name : str
+    tracer_steps : [int]
+    """
+    filepath = paths.tracer_cache_filepath(tracer_id, model, table_name=table_name)
+    cache_time = os.path.getmtime(filepath)
+
+    for step in tracer_steps:
+        tracer_filepath = paths.tracer_filepath(tracer_id, step, model=model)
+
+        if os.path.exists(tracer_filepath):
+            if os.path.getmtime(tracer_filepath) > cache_time:
+                return True
+
+    return False
+
+
 def check_cache_path(model, verbose=True):
     """Check that the model cache directory exists
     """
@@ -33,6 +33,8 @@ class Tracer:
         from original STIR data, and resulting SkyNet output
     composition : {abu_var: pd.DataFrame}
         Tables of X and Y versus time
+    final_composition : {abu_var: np.ndarray}
+        X and Y at the final timestep
     files : h5py.File
         Raw hdf5 tracer output files from skynet
     mass : float
@@ -45,8 +47,12 @@ class Tracer:
         Table of isotopes used in model (name, Z, A)
     network_unique : {iso_group: [int]}
         unique A and Z in network
+    network_arrays : NetworkArrays
+        arrays precomputed from network, for repeated calculations
     paths : str
         Paths to model input/output directories
+    precision : str
+        floating-point dtype of composition tables
     reload : bool
         whether to force reload from raw file (i.e. don't load cache)
     save : bool
@@ -63,11 +69,31 @@ class Tracer:
         The tracer ID/index
     verbose : bool
         Option to print output
+
+    If load_all=False, data attributes (columns, composition, sums, etc.)
+    are instead loaded on first access (see _lazy_loaders)
     """
 
+    # methods that load each data attribute (in order), when first accessed.
+    # columns include sumy, abar and zbar (derived from Y), as in load_all()
+    _lazy_loaders = {
+        'files': ('load_files',),
+        'columns': ('load_columns', 'get_sumy_abar', 'get_zbar'),
+        'time': ('load_columns', 'get_sumy_abar', 'get_zbar'),
+        'network': ('load_network',),
+        'network_unique': ('get_network_unique',),
+        'network_arrays': ('get_network_unique',),
+        'composition': ('load_composition',),
+        'final_composition': ('get_final_composition',),
+        'sums': ('load_sums',),
+        'most_abundant': ('get_most_abundant',),
+        'summary': ('get_summary',),
+    }
+
     def __init__(self, tracer_id, model, load_all=True,
                  steps=(1, 2), save=True, reload=False,
-                 verbose=True):
+                 tracer_network=None, network_arrays=None,
+                 precision='float64', verbose=True):
         """
         parameters
         ----------
@@ -75,8 +101,17 @@ class Tracer:
         model : str
         steps : [int]
         load_all : bool
+            load all data now. Otherwise, each attribute is loaded on first access
         save : bool
         reload : bool
+        tracer_network : pd.DataFrame
+            network table, if already loaded (e.g. shared by all tracers in a model)
+        network_arrays : NetworkArrays
+            precomputed arrays of tracer_network, if already calculated
+        precision : 'float64' or 'float32'
+            dtype to store composition tables in. float32 halves their memory,
+            at the cost of ~7 significant digits (cached tables and sums
+            are always float64)
         verbose : bool
         """
         self.tracer_id = tracer_id
@@ -85,16 +120,14 @@ class Tracer:
         self.steps = steps
         self.save = save
         self.reload = reload
+        self.precision = precision
 
-        self.files = None
-        self.network = None
-        self.composition = None
-        self.network_unique = None
-        self.most_abundant = None
-        self.sums = None
-        self.time = None
-        self.summary = dict.fromkeys(['total_heating'])
-        self.columns = dict.fromkeys(['skynet', 'stir'])
+        if tracer_network is not None:
+            self.network = tracer_network
+
+            if network_arrays is not None:
+                self.network_arrays = network_arrays
+                self.network_unique = network_arrays.unique
 
         self.mass = load_save.get_stir_mass_element(tracer_id, self.model)
         self.title = f'{self.model}, tracer_{self.tracer_id}'
@@ -103,6 +136,19 @@ class Tracer:
         if load_all:
             self.load_all()
 
+    def __getattr__(self, attr):
+        """Load data attribute on first access, if not already loaded
+        """
+        loaders = self._lazy_loaders.get(attr)
+
+        if loaders is None:
+            raise AttributeError(f"'Tracer' object has no attribute '{attr}'")
+
+        for loader in loaders:
+            getattr(self, loader)()
+
+        return self.__dict__[attr]
+
     # ===============================================================
     #                      Loading/extracting
     # ===============================================================
@@ -112,10 +158,15 @@ class Tracer:
         t0 = time.time()
 
         self.load_files()
-        self.load_stir()
         self.load_columns()
-        self.load_network()
+
+        if 'network' not in self.__dict__:
+            self.load_network()
+        elif 'network_arrays' not in self.__dict__:
+            self.get_network_unique()
+
         self.load_composition()
+        self.get_final_composition()
         self.load_sums()
 
         self.get_most_abundant()
@@ -132,6 +183,7 @@ class Tracer:
         self.files = load_save.load_files(self.tracer_id,
                                           tracer_steps=self.steps,
                                           model=self.model,
+                                          reload=self.reload,
                                           verbose=self.verbose)
 
     def load_stir(self):
@@ -141,8 +193,11 @@ class Tracer:
         self.columns['stir'] = load_save.load_stir_tracer(self.tracer_id, model=self.model)
 
     def load_columns(self):
-        """Load table of scalars
+        """Load tables of scalars (skynet and stir)
         """
+        self.columns = dict.fromkeys(['skynet', 'stir'])
+        self.load_stir()
+
         self.printv('Loading columns')
         columns = load_save.load_table(self.tracer_id,
                                        model=self.model,
@@ -180,6 +235,9 @@ class Tracer:
                                                       save=self.save,
                                                       verbose=False)
 
+        for abu_var, table in self.composition.items():
+            self.composition[abu_var] = table.astype(self.precision, copy=False)
+
     def load_sums(self):
         """Get X, Y sums over A, Z
         """
@@ -189,6 +247,7 @@ class Tracer:
                                         model=self.model,
                                         tracer_files=self.files,
                                         tracer_network=self.network,
+                                        network_arrays=self.network_arrays,
                                         reload=self.reload,
                                         save=self.save,
                                         verbose=False)
@@ -197,9 +256,20 @@ class Tracer:
     #                      Analysis
     # ===============================================================
     def get_network_unique(self):
-        """Get unique Z and A in network
+        """Get unique Z and A in network, and precomputed network arrays
+        """
+        self.network_arrays = network.NetworkArrays(self.network)
+        self.network_unique = self.network_arrays.unique
+
+    def get_final_composition(self):
+        """Get composition (X, Y) at final timestep
         """
-        self.network_unique = network.get_network_unique(self.network)
+        final_composition = {}
+
+        for abu_var, table in self.composition.items():
+            final_composition[abu_var] = table.iloc[-1].to_numpy()
+
+        self.final_composition = final_composition
 
     def get_sumy_abar(self):
         """Get sumY and Abar versus time from Y table
@@ -214,15 +284,19 @@ class Tracer:
         columns = self.columns['skynet']
         columns['zbar'] = network.get_zbar(self.composition['Y'],
                                            tracer_network=self.network,
-                                           ye=columns['ye'])
+                                           ye=columns.get('ye'),
+                                           abar=columns.get('abar'),
+                                           network_arrays=self.network_arrays)
 
     def get_summary(self):
         """Get summary quantities
         """
-        self.summary['total_heating'] = tracer_tools.get_total_heating(
+        summary = {}
+        summary['total_heating'] = tracer_tools.get_total_heating(
                                                 table=self.columns['skynet'])
 
-        self.summary['max_ni56'] = self.composition['X']['ni56'].max()
+        summary['max_ni56'] = self.composition['X']['ni56'].max()
+        self.summary = summary
 
     def get_most_abundant(self):
         """Get most abundant isotopes in network
@@ -251,7 +325,8 @@ class Tracer:
             atomic mass number
         """
         return network.select_composition(self.composition[abu_var],
-                                          tracer_network=self.network, z=z, a=a)
+                                          tracer_network=self.network, z=z, a=a,
+                                          network_arrays=self.network_arrays)
 
     def select_network(self, z=None, a=None):
         """Return subset of network with given Z and/or A
@@ -263,7 +338,8 @@ class Tracer:
         a : int
             atomic mass number
         """
-        return network.select_isotopes(self.network, z=z, a=a)
+        return network.select_isotopes(self.network, z=z, a=a,
+                                       network_arrays=self.network_arrays)
 
     # ===============================================================
     #                      Plotting